@@ -6,7 +6,13 @@ This module integrates our custom agent with the AndroidWorld benchmark framewor
 
 import os
 import sys
+import asyncio
+import itertools
 import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from typing import Dict, Any, Optional
 
 # Add the current directory to Python path for imports
@@ -16,6 +22,29 @@ from custom_agent import CustomAgent
 from gbox_device_controller import GBOXDeviceController, GBOXLocalDeviceController
 from device_registration import GBOXDeviceManager
 
+# Use orjson for result serialization when available; it is several times
+# faster than the stdlib encoder on the nested per-task result dicts
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    import json
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+# Import AndroidWorld once at module load; initialize_androidworld previously
+# re-ran the import machinery on every call. The module still loads (for mock
+# workflows) when android_world is not installed.
+try:
+    from android_world import registry as _aw_registry_mod
+    from android_world.env import env_launcher as _aw_env_launcher
+except ImportError:
+    _aw_registry_mod = None
+    _aw_env_launcher = None
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,46 +52,91 @@ logger = logging.getLogger(__name__)
 
 class AndroidWorldIntegration:
     """Integration layer between Custom Agent and AndroidWorld."""
-    
+
+    # Slots avoid a per-instance __dict__; keep in sync with __init__
+    __slots__ = ("adb_path", "gbox_api_key", "device_id", "custom_agent",
+                 "task_registry", "_aw_family", "env", "device_manager",
+                 "_task_cache", "_controller_pool", "_aw_registry_cache",
+                 "_submit_pool", "_submitted", "_task_counter", "_env_lock")
+
     def __init__(self, adb_path: str, gbox_api_key: str, device_id: str = "emulator-5554"):
         self.adb_path = adb_path
         self.gbox_api_key = gbox_api_key
         self.device_id = device_id
         self.custom_agent = None
         self.task_registry = None
+        self._aw_family = None
         self.env = None
         self.device_manager = GBOXDeviceManager(adb_path, gbox_api_key)
+        self._task_cache = {}
+        self._controller_pool = None
+        self._aw_registry_cache = None
+        self._submit_pool = None
+        self._submitted = {}
+        self._task_counter = itertools.count(1)
+        # Serializes AndroidEnv interactions: the env wraps one adb
+        # connection and is not safe to drive from several threads at once
+        self._env_lock = threading.Lock()
         
         logger.info(f"AndroidWorld Integration initialized for device: {device_id}")
-    
-    def setup_gbox_device(self) -> bool:
-        """Set up GBOX device controller for the emulator."""
+
+    @property
+    def _aw_registry(self):
+        """Cached AndroidWorld task registry (the lookup rescans on every call)."""
+        # Explicit slot-backed cache; cached_property needs __dict__, which
+        # __slots__ removes
+        if self._aw_registry_cache is None:
+            self._aw_registry_cache = self.task_registry.get_registry(self._aw_family)
+        return self._aw_registry_cache
+
+    def _create_controller(self, gbox_device_id: str, device=None):
+        """Create a GBOX device controller appropriate for the device type.
+
+        Passing `device` hands the controller an already-obtained SDK
+        handle instead of registering/fetching the device again.
+        """
+        if self.device_id.startswith('emulator-'):
+            # Use local device controller for emulator
+            return GBOXLocalDeviceController(gbox_device_id, self.gbox_api_key,
+                                             device=device)
+        # Use cloud device controller for physical devices
+        return GBOXDeviceController(self.gbox_api_key, device=device)
+
+    @contextmanager
+    def _borrow_controller(self):
+        """Borrow a pooled device controller for the duration of one task."""
+        controller = self._controller_pool.get()
         try:
-            logger.info("Setting up GBOX device controller...")
-            
+            yield controller
+        finally:
+            self._controller_pool.put(controller)
+
+    def setup_gbox_device(self, pool_size: int = 4) -> bool:
+        """Set up a pool of GBOX device controllers for the emulator."""
+        try:
+            logger.info("Setting up GBOX device controllers...")
+
             # First, register the emulator with GBOX
             gbox_device_id = self.device_manager.setup_emulator_for_gbox(self.device_id)
-            
+
             if not gbox_device_id:
                 logger.error("Failed to register emulator with GBOX")
                 return False
-            
-            # Create GBOX device controller
-            if self.device_id.startswith('emulator-'):
-                # Use local device controller for emulator
-                self.custom_agent = CustomAgent(
-                    device_controller=GBOXLocalDeviceController(gbox_device_id, self.gbox_api_key)
-                )
-                logger.info(f"Created GBOX local device controller for emulator: {gbox_device_id}")
-            else:
-                # Use cloud device controller for physical devices
-                self.custom_agent = CustomAgent(
-                    device_controller=GBOXDeviceController(self.gbox_api_key)
-                )
-                logger.info("Created GBOX cloud device controller")
-            
+
+            # One controller per worker so parallel benchmark runs don't
+            # serialize on a single device connection. The first controller
+            # registers the device with GBOX; the rest share its SDK handle
+            # so the same device isn't registered once per pool slot
+            first = self._create_controller(gbox_device_id)
+            self._controller_pool = queue.Queue()
+            self._controller_pool.put(first)
+            for _ in range(pool_size - 1):
+                self._controller_pool.put(
+                    self._create_controller(gbox_device_id, device=first.device))
+
+            logger.info(f"Created pool of {pool_size} GBOX device controllers for: {gbox_device_id}")
             return True
-            
+
         except Exception as e:
             logger.error(f"Failed to setup GBOX device: {e}")
             return False
@@ -70,22 +144,19 @@ class AndroidWorldIntegration:
     def initialize_androidworld(self):
         """Initialize the AndroidWorld environment."""
         try:
-            # Import AndroidWorld components
-            from android_world import registry
-            from android_world.env import env_launcher
-            
-            logger.info("AndroidWorld components imported successfully")
-            
-            # Get task registry
-            self.task_registry = registry.TaskRegistry()
-            aw_registry = self.task_registry.get_registry(
-                self.task_registry.ANDROID_WORLD_FAMILY
-            )
-            
-            logger.info(f"Available tasks: {list(aw_registry.keys())}")
+            if _aw_registry_mod is None or _aw_env_launcher is None:
+                logger.error("AndroidWorld is not installed")
+                return False
+
+            # Get task registry; bind the family constant once instead of
+            # re-resolving the attribute chain on every lookup
+            self.task_registry = _aw_registry_mod.TaskRegistry()
+            self._aw_family = self.task_registry.ANDROID_WORLD_FAMILY
+
+            logger.info(f"Available tasks: {list(self._aw_registry.keys())}")
             
             # Initialize environment
-            self.env = env_launcher.load_and_setup_env(
+            self.env = _aw_env_launcher.load_and_setup_env(
                 console_port=5554,
                 emulator_setup=False,
                 adb_path=self.adb_path
@@ -102,42 +173,56 @@ class AndroidWorldIntegration:
         """Run a specific benchmark task using our custom agent."""
         if not self.task_registry:
             return {"success": False, "error": "AndroidWorld not initialized"}
-        
-        if not self.custom_agent:
+
+        if self._controller_pool is None:
             return {"success": False, "error": "GBOX device not set up"}
         
         try:
             # Get task from registry
-            aw_registry = self.task_registry.get_registry(
-                self.task_registry.ANDROID_WORLD_FAMILY
-            )
-            
+            aw_registry = self._aw_registry
+
             if task_name not in aw_registry:
                 return {"success": False, "error": f"Task {task_name} not found"}
             
             task_type = aw_registry[task_name]
             logger.info(f"Running benchmark task: {task_name}")
+
+            # Reuse the constructed task when the same name repeats; parameter
+            # generation and object construction only happen on the first run
+            cached = self._task_cache.get(task_name)
+            if cached is None:
+                params = task_type.generate_random_params()
+                task = task_type(params)
+                self._task_cache[task_name] = (task, params)
+            else:
+                task, params = cached
+
+            # Initialize the task (resets device state for the cached task
+            # too); env interactions are serialized on the shared lock
+            with self._env_lock:
+                task.initialize_task(self.env)
             
-            # Generate random parameters for the task
-            params = task_type.generate_random_params()
-            task = task_type(params)
-            
-            # Initialize the task
-            task.initialize_task(self.env)
-            
-            # Execute using our custom agent with GBOX device controller
-            result = self.custom_agent.run_task(task_name, {
-                "goal": str(task.goal),
-                "complexity": task.complexity,
-                "params": params
-            })
-            
-            # Check if task was successful
-            if self.env:
-                task_success = task.is_successful(self.env) == 1
-                result["task_success"] = task_success
-                result["goal"] = str(task.goal)
-            
+            # Stringify the goal once; task.goal may be a computed property
+            goal_str = str(task.goal)
+            complexity = task.complexity
+
+            # Execute with an agent bound to a borrowed pooled controller
+            with self._borrow_controller() as controller:
+                agent = CustomAgent(device_controller=controller)
+                result = agent.run_task(task_name, {
+                    "goal": goal_str,
+                    "complexity": complexity,
+                    "params": params
+                }, extras={"goal": goal_str})
+
+            # Only pay for the device-state success check when the agent ran
+            # to completion; is_successful scans device state over RPC
+            if self.env and result.get("success"):
+                with self._env_lock:
+                    result["task_success"] = task.is_successful(self.env) == 1
+            else:
+                result["task_success"] = False
+
             return result
             
         except Exception as e:
@@ -150,32 +235,42 @@ class AndroidWorldIntegration:
             return []
         
         try:
-            aw_registry = self.task_registry.get_registry(
-                self.task_registry.ANDROID_WORLD_FAMILY
-            )
-            return list(aw_registry.keys())
+            return list(self._aw_registry.keys())
         except Exception as e:
             logger.error(f"Failed to get available tasks: {e}")
             return []
     
-    def run_multiple_tasks(self, task_names: list, max_tasks: int = 5) -> Dict[str, Any]:
-        """Run multiple benchmark tasks."""
-        results = []
+    def run_multiple_tasks(self, task_names: list, max_tasks: int = 5,
+                           max_concurrency: int = 4) -> Dict[str, Any]:
+        """Run multiple benchmark tasks with a bounded worker pool.
+
+        Environment interactions (task setup and success checks) are
+        serialized on a shared lock, so with the default single device the
+        workers only overlap the agent-side RPC waits; max_concurrency > 1
+        yields fully parallel runs only with one env/device per worker.
+        """
+        selected_tasks = task_names[:max_tasks]
+        results = [None] * len(selected_tasks)
         successful_tasks = 0
-        
-        for i, task_name in enumerate(task_names[:max_tasks]):
-            logger.info(f"Running task {i+1}/{len(task_names[:max_tasks])}: {task_name}")
-            
-            result = self.run_benchmark_task(task_name)
-            results.append(result)
-            
-            if result.get("success", False):
-                successful_tasks += 1
-            
-            # Small delay between tasks
-            import time
-            time.sleep(1)
-        
+
+        # Task execution is dominated by device RPC latency, so overlap the
+        # waits with a small thread pool instead of running strictly serially
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            futures = {
+                executor.submit(self.run_benchmark_task, task_name): i
+                for i, task_name in enumerate(selected_tasks)
+            }
+
+            for future in as_completed(futures):
+                i = futures[future]
+                result = future.result()
+                results[i] = result
+
+                logger.info(f"Completed task {i+1}/{len(selected_tasks)}: {selected_tasks[i]}")
+
+                if result.get("success", False):
+                    successful_tasks += 1
+
         return {
             "total_tasks": len(results),
             "successful_tasks": successful_tasks,
@@ -183,17 +278,82 @@ class AndroidWorldIntegration:
             "results": results
         }
     
+    def submit_benchmark_task(self, task_name: str) -> str:
+        """Submit a benchmark task and return a task_id immediately.
+
+        The task runs on a background worker; callers poll get_task_status
+        instead of blocking on run_benchmark_task, so several tasks can be
+        in flight at once (bounded by the controller pool).
+        """
+        if self._submit_pool is None:
+            self._submit_pool = ThreadPoolExecutor(max_workers=4)
+
+        task_id = f"task-{next(self._task_counter)}"
+        self._submitted[task_id] = self._submit_pool.submit(
+            self.run_benchmark_task, task_name)
+        logger.info(f"Submitted {task_name} as {task_id}")
+        return task_id
+
+    def get_task_status(self, task_id: str) -> Dict[str, Any]:
+        """Poll a submitted task: running, completed (with result), or unknown."""
+        future = self._submitted.get(task_id)
+        if future is None:
+            return {"task_id": task_id, "status": "unknown"}
+        if not future.done():
+            return {"task_id": task_id, "status": "running"}
+
+        # Completed: hand the result back and drop the bookkeeping entry
+        del self._submitted[task_id]
+        try:
+            return {"task_id": task_id, "status": "completed",
+                    "result": future.result()}
+        except Exception as e:
+            return {"task_id": task_id, "status": "failed", "error": str(e)}
+
+    async def run_benchmark_task_async(self, task_name: str) -> Dict[str, Any]:
+        """Async wrapper around run_benchmark_task for event-loop callers."""
+        return await asyncio.to_thread(self.run_benchmark_task, task_name)
+
+    async def run_multiple_tasks_async(self, task_names: list, max_tasks: int = 5,
+                                       max_concurrency: int = 4) -> Dict[str, Any]:
+        """Run multiple benchmark tasks on one event loop, bounded by a semaphore."""
+        selected_tasks = task_names[:max_tasks]
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(task_name):
+            async with semaphore:
+                return await self.run_benchmark_task_async(task_name)
+
+        results = list(await asyncio.gather(*(run_one(t) for t in selected_tasks)))
+        successful_tasks = sum(1 for r in results if r.get("success", False))
+
+        return {
+            "total_tasks": len(results),
+            "successful_tasks": successful_tasks,
+            "success_rate": successful_tasks / len(results) if results else 0,
+            "results": results
+        }
+
+    def save_results(self, results: Dict[str, Any], output_path: str) -> bool:
+        """Serialize benchmark results to disk with the fastest available encoder."""
+        try:
+            with open(output_path, 'wb') as f:
+                f.write(_dumps(results))
+            logger.info(f"Results saved to {output_path}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save results: {e}")
+            return False
+
     def get_device_status(self) -> Dict[str, Any]:
         """Get current device status and information."""
         try:
             available_devices = self.device_manager.get_available_devices()
-            emulator_device = None
-            
-            for device in available_devices:
-                if device['id'] == self.device_id:
-                    emulator_device = device
-                    break
-            
+
+            # Index by id instead of scanning the list linearly
+            devices_by_id = {device['id']: device for device in available_devices}
+            emulator_device = devices_by_id.get(self.device_id)
+
             if emulator_device:
                 return {
                     "device_id": self.device_id,
@@ -217,12 +377,25 @@ class AndroidWorldIntegration:
     
     def cleanup(self):
         """Clean up resources."""
-        if self.custom_agent and hasattr(self.custom_agent.device_controller, 'close_box'):
-            try:
-                self.custom_agent.device_controller.close_box()
-                logger.info("GBOX device controller closed")
-            except Exception as e:
-                logger.error(f"Error closing GBOX device controller: {e}")
+        # Drop the cached registry and tasks so a re-initialized integration rebuilds them
+        self._aw_registry_cache = None
+        self._task_cache.clear()
+
+        if self._submit_pool is not None:
+            self._submit_pool.shutdown(wait=True)
+            self._submit_pool = None
+            self._submitted.clear()
+
+        if self._controller_pool is not None:
+            while not self._controller_pool.empty():
+                controller = self._controller_pool.get_nowait()
+                if hasattr(controller, 'close_box'):
+                    try:
+                        controller.close_box()
+                        logger.info("GBOX device controller closed")
+                    except Exception as e:
+                        logger.error(f"Error closing GBOX device controller: {e}")
+            self._controller_pool = None
         
         if self.env:
             try:
@@ -5,18 +5,38 @@ This agent will be able to execute tasks using the AndroidWorld framework.
 """
 
 import time
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional
 from abc import ABC, abstractmethod
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+# Set up logging (configuration is left to the application entry point;
+# android_world_integration already calls basicConfig)
 logger = logging.getLogger(__name__)
 
+# Pre-bound logger methods for the per-task hot path (skips the attribute
+# lookup on every call)
+_log_info = logger.info
+_log_error = logger.error
+
+
+def uses_params(flag: bool):
+    """Mark a task handler as consuming (or ignoring) its params dict."""
+    def mark(func):
+        func.uses_params = flag
+        return func
+    return mark
+
 
 class DeviceController(ABC):
     """Abstract base class for device control operations."""
-    
+
+    # Empty slots on the base so subclasses can declare their own without
+    # silently reintroducing a per-instance __dict__
+    __slots__ = ()
+
     @abstractmethod
     def click(self, x: int, y: int) -> bool:
         """Click at specific coordinates."""
@@ -42,10 +62,30 @@ class DeviceController(ABC):
         """Get current screen information."""
         pass
 
+    @abstractmethod
+    def execute_batch(self, commands: List[str]) -> bool:
+        """Execute multiple input commands in a single device round-trip."""
+        pass
+
+    def press_keys(self, keys: List[str]) -> bool:
+        """Press a sequence of keys.
+
+        Default falls back to one press_key call per key; real controllers
+        override this with a single `input keyevent K1 K2 ...` invocation.
+        """
+        return all(self.press_key(key) for key in keys)
+
+    @abstractmethod
+    def wait_for_idle(self, timeout_ms: int = 2000, poll_ms: int = 100) -> bool:
+        """Wait until the device UI settles, polling instead of sleeping a fixed time."""
+        pass
+
 
 class MockDeviceController(DeviceController):
     """Mock device controller for testing without actual device connection."""
-    
+
+    __slots__ = ()
+
     def click(self, x: int, y: int) -> bool:
         logger.info(f"Mock: Clicking at coordinates ({x}, {y})")
         return True
@@ -70,77 +110,125 @@ class MockDeviceController(DeviceController):
             "timestamp": time.time()
         }
 
+    def execute_batch(self, commands: List[str]) -> bool:
+        logger.info(f"Mock: Executing batch of {len(commands)} commands: {commands}")
+        return True
+
+    def wait_for_idle(self, timeout_ms: int = 2000, poll_ms: int = 100) -> bool:
+        # The mock UI is always ready, so return immediately instead of blocking
+        return True
+
 
 class TaskExecutor:
     """Handles task execution logic."""
-    
-    def __init__(self, device_controller: DeviceController):
+
+    __slots__ = ("device_controller", "task_history", "_history_lock", "_dispatch")
+
+    def __init__(self, device_controller: DeviceController, history_maxlen: Optional[int] = 1024):
         self.device_controller = device_controller
-        self.task_history = []
+        # Bounded history keeps memory constant over long benchmark runs;
+        # pass history_maxlen=None for an unbounded deque
+        self.task_history = deque(maxlen=history_maxlen)
+        self._history_lock = threading.Lock()
+        # Dispatch table: adding a task handler stays O(1) instead of
+        # growing an if/elif chain in execute_task
+        self._dispatch = {
+            "RecipeAddMultipleRecipes": self._execute_recipe_task,
+            "SimpleCalendarAddOneEvent": self._execute_calendar_task,
+        }
     
-    def execute_task(self, task_name: str, task_params: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a specific task with given parameters."""
-        logger.info(f"Executing task: {task_name}")
-        
-        start_time = time.time()
+    def execute_task(self, task_name: str, task_params: Dict[str, Any],
+                     extras: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Execute a specific task with given parameters.
+
+        Any `extras` are folded into the result dict on creation, so callers
+        don't have to mutate the result after the fact.
+        """
+        # perf_counter is monotonic (immune to clock adjustments); wall-clock
+        # time is only kept for the timestamp field
+        timestamp = time.time()
+        start_time = time.perf_counter()
         success = False
         error_message = None
-        
+
         try:
-            if task_name == "RecipeAddMultipleRecipes":
-                success = self._execute_recipe_task(task_params)
-            elif task_name == "SimpleCalendarAddOneEvent":
-                success = self._execute_calendar_task(task_params)
+            handler = self._dispatch.get(task_name)
+            if handler is not None:
+                # Handlers marked uses_params=False skip the params plumbing
+                if not getattr(handler, "uses_params", True):
+                    task_params = {}
+                success = handler(task_params)
             else:
                 success = self._execute_generic_task(task_name, task_params)
-                
+
         except Exception as e:
             error_message = str(e)
-            logger.error(f"Task execution failed: {error_message}")
-        
-        execution_time = time.time() - start_time
-        
+            _log_error("Task execution failed: %s", error_message)
+
+        execution_time = time.perf_counter() - start_time
+
         result = {
             "task_name": task_name,
             "success": success,
             "execution_time": execution_time,
             "error_message": error_message,
-            "timestamp": start_time
+            "timestamp": timestamp
         }
-        
-        self.task_history.append(result)
+        if extras:
+            result.update(extras)
+
+        with self._history_lock:
+            self.task_history.append(result)
         return result
     
+    def history_snapshot(self) -> list:
+        """Return a copy of the task history, safe to take concurrently.
+
+        Iterating a deque while another thread appends raises RuntimeError,
+        so when an agent is shared across threads the copy has to happen
+        under the same lock that guards the appends.
+        """
+        with self._history_lock:
+            return list(self.task_history)
+
+    @uses_params(False)
     def _execute_recipe_task(self, params: Dict[str, Any]) -> bool:
         """Execute recipe-related tasks."""
-        logger.info("Executing recipe task...")
-        
-        # Mock recipe task execution
-        # In real implementation, this would use the device controller
-        self.device_controller.click(500, 1200)  # Click on add recipe button
-        time.sleep(1)
-        self.device_controller.type_text("Test Recipe")
-        time.sleep(1)
-        self.device_controller.click(500, 1400)  # Click save button
-        
+        _log_info("Executing recipe task...")
+
+        # Batch the whole click -> type -> click flow into a single device
+        # round-trip instead of paying one RPC (plus a sleep) per action
+        commands = [
+            "input tap 500 1200",          # Tap add recipe button
+            "input text 'Test Recipe'",
+            "input tap 500 1400",          # Tap save button
+        ]
+        if not self.device_controller.execute_batch(commands):
+            return False
+
+        # Wait for the UI to settle once after the batch lands
+        self.device_controller.wait_for_idle()
         return True
-    
+
+    @uses_params(False)
     def _execute_calendar_task(self, params: Dict[str, Any]) -> bool:
         """Execute calendar-related tasks."""
-        logger.info("Executing calendar task...")
-        
-        # Mock calendar task execution
-        self.device_controller.click(500, 1200)  # Click on add event button
-        time.sleep(1)
-        self.device_controller.type_text("Test Event")
-        time.sleep(1)
-        self.device_controller.click(500, 1400)  # Click save button
-        
+        _log_info("Executing calendar task...")
+
+        commands = [
+            "input tap 500 1200",          # Tap add event button
+            "input text 'Test Event'",
+            "input tap 500 1400",          # Tap save button
+        ]
+        if not self.device_controller.execute_batch(commands):
+            return False
+
+        self.device_controller.wait_for_idle()
         return True
     
     def _execute_generic_task(self, task_name: str, params: Dict[str, Any]) -> bool:
         """Execute generic tasks."""
-        logger.info(f"Executing generic task: {task_name}")
+        _log_info("Executing generic task: %s", task_name)
         
         # Generic task execution logic
         # This would be customized based on the specific task
@@ -148,33 +236,48 @@ class TaskExecutor:
 
 
 class CustomAgent:
-    """Main custom agent class that integrates with AndroidWorld."""
-    
-    def __init__(self, device_controller: Optional[DeviceController] = None):
+    """Main custom agent class that integrates with AndroidWorld.
+
+    Instances may be shared across threads: history mutation and snapshots
+    are serialized by the executor's lock, and the tasks_executed counter
+    is derived from the history rather than tracked separately. Callers
+    that need isolated device state should still use one agent per worker,
+    as the integration layer does.
+    """
+
+    __slots__ = ("device_controller", "task_executor", "agent_id")
+
+    def __init__(self, device_controller: Optional[DeviceController] = None,
+                 history_maxlen: Optional[int] = 1024):
         self.device_controller = device_controller or MockDeviceController()
-        self.task_executor = TaskExecutor(self.device_controller)
+        self.task_executor = TaskExecutor(self.device_controller, history_maxlen=history_maxlen)
         self.agent_id = f"custom_agent_{int(time.time())}"
         
         logger.info(f"Custom Agent initialized with ID: {self.agent_id}")
     
-    def run_task(self, task_name: str, task_params: Dict[str, Any] = None) -> Dict[str, Any]:
+    def run_task(self, task_name: str, task_params: Dict[str, Any] = None,
+                 extras: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Run a specific task."""
         if task_params is None:
             task_params = {}
-        
-        logger.info(f"Agent {self.agent_id} starting task: {task_name}")
-        
+
         # Execute the task
-        result = self.task_executor.execute_task(task_name, task_params)
-        
-        # Log the result
-        if result["success"]:
-            logger.info(f"Task {task_name} completed successfully in {result['execution_time']:.2f}s")
-        else:
-            logger.error(f"Task {task_name} failed: {result['error_message']}")
-        
+        result = self.task_executor.execute_task(task_name, task_params, extras=extras)
+
+        # One structured record per task; %-style args are only interpolated
+        # when a handler actually consumes the record
+        log = _log_info if result["success"] else _log_error
+        log("agent=%s task=%s success=%s time=%.2fs error=%s",
+            self.agent_id, task_name, result["success"],
+            result["execution_time"], result["error_message"])
+
         return result
-    
+
+    async def run_task_async(self, task_name: str, task_params: Dict[str, Any] = None,
+                             extras: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run a specific task without blocking the event loop."""
+        return await asyncio.to_thread(self.run_task, task_name, task_params, extras)
+
     def get_status(self) -> Dict[str, Any]:
         """Get current agent status."""
         return {
@@ -187,7 +290,7 @@ class CustomAgent:
     
     def get_task_history(self) -> list:
         """Get history of executed tasks."""
-        return self.task_executor.task_history
+        return self.task_executor.history_snapshot()
 
 
 def main():
@@ -5,8 +5,11 @@ Provides real device control using GBOX SDK for AndroidWorld tasks
 
 import os
 import time
+import asyncio
+import functools
 import logging
-from typing import Dict, Any, Optional, Tuple
+import subprocess
+from typing import Dict, Any, List, Optional, Tuple
 from abc import ABC, abstractmethod
 
 try:
@@ -16,236 +19,440 @@ except ImportError:
     GBOX_AVAILABLE = False
     print("⚠️  GBOX SDK not available. Install with: pip install gbox-sdk")
 
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
 from custom_agent import DeviceController
 
-class GBOXDeviceController(DeviceController):
-    """Real device controller using GBOX SDK"""
-    
-    def __init__(self, device_id: str, gbox_api_key: Optional[str] = None):
-        super().__init__(device_id)
-        self.gbox_api_key = gbox_api_key or os.getenv('GBOX_API_KEY')
+logger = logging.getLogger(__name__)
+
+GBOX_API_BASE = "https://api.gbox.ai/v1"
+
+# Read once at import; os.getenv walks the environ mapping on every call
+# and the key doesn't change mid-process
+_ENV_API_KEY = os.getenv('GBOX_API_KEY')
+
+@functools.lru_cache(maxsize=4)
+def _get_gbox_client(api_key: str):
+    """Share one GBoxClient per API key so all controllers reuse its
+    connection pool and auth handshake instead of opening their own."""
+    return GBoxClient(api_key=api_key)
+
+class _GBOXBase(DeviceController):
+    """Shared implementation for the GBOX-backed controllers.
+
+    The cloud and local controllers differ only in how the device handle is
+    obtained and in transport for the ADB-level operations; everything that
+    goes through the SDK device object lives here once, parameterized by
+    `_log_prefix`, instead of being duplicated per subclass.
+    """
+
+    # One controller is created per device in a fleet; slots drop the
+    # per-instance __dict__ and make the self.device lookups in the
+    # click/type/swipe hot path a fixed-offset read
+    __slots__ = ('device_id', 'gbox_api_key', 'client', 'device',
+                 '_screen_dims', '_static_info')
+
+    # Subclasses override for log output and the get_device_info payload
+    _log_prefix = "GBOX"
+    _device_type: Optional[str] = None
+
+    def __init__(self, device_id: str, gbox_api_key: Optional[str] = None,
+                 device=None):
+        self.device_id = device_id
+        self.gbox_api_key = gbox_api_key or _ENV_API_KEY
         self.client = None
         self.device = None
-        
+        self._screen_dims = None
+        self._static_info = None
+
         if not self.gbox_api_key:
             raise ValueError("GBOX_API_KEY environment variable required")
-        
-        if GBOX_AVAILABLE:
-            self._initialize_gbox()
-        else:
+
+        if not GBOX_AVAILABLE:
             raise RuntimeError("GBOX SDK not available")
-    
-    def _initialize_gbox(self):
-        """Initialize GBOX client and connect to device"""
-        try:
-            self.client = GBoxClient(api_key=self.gbox_api_key)
-            self.device = self.client.get_device(self.device_id)
-            logging.info(f"✅ Connected to GBOX device: {self.device_id}")
-        except Exception as e:
-            logging.error(f"❌ Failed to connect to GBOX device: {e}")
-            raise
-    
+
+        if device is not None:
+            # Adopt an already-obtained SDK device handle: pooled
+            # controllers for the same device register/fetch it once and
+            # share the handle instead of repeating the round-trip per slot
+            self.client = _get_gbox_client(self.gbox_api_key)
+            self.device = device
+        else:
+            self._initialize()
+
+    def _initialize(self):
+        """Obtain the SDK device handle; subclasses specialize this."""
+        raise NotImplementedError
+
     def click(self, x: int, y: int) -> bool:
         """Click at specific coordinates using GBOX"""
         try:
             if self.device:
                 self.device.click(x, y)
-                logging.info(f"🖱️  GBOX: Clicked at ({x}, {y})")
+                logger.info("🖱️  %s: Clicked at (%d, %d)", self._log_prefix, x, y)
                 return True
             return False
         except Exception as e:
-            logging.error(f"❌ GBOX click failed: {e}")
+            logger.error("❌ %s click failed: %s", self._log_prefix, e)
             return False
-    
+
     def type_text(self, text: str) -> bool:
         """Type text using GBOX"""
         try:
             if self.device:
                 self.device.type_text(text)
-                logging.info(f"⌨️  GBOX: Typed text: '{text}'")
+                logger.info("⌨️  %s: Typed text: '%s'", self._log_prefix, text)
                 return True
             return False
         except Exception as e:
-            logging.error(f"❌ GBOX type_text failed: {e}")
+            logger.error("❌ %s type_text failed: %s", self._log_prefix, e)
             return False
-    
+
     def swipe(self, start_x: int, start_y: int, end_x: int, end_y: int, duration: float = 0.5) -> bool:
         """Swipe between coordinates using GBOX"""
         try:
             if self.device:
                 self.device.swipe(start_x, start_y, end_x, end_y, duration)
-                logging.info(f"👆 GBOX: Swiped from ({start_x}, {start_y}) to ({end_x}, {end_y})")
+                logger.info("👆 %s: Swiped from (%d, %d) to (%d, %d)",
+                            self._log_prefix, start_x, start_y, end_x, end_y)
                 return True
             return False
         except Exception as e:
-            logging.error(f"❌ GBOX swipe failed: {e}")
+            logger.error("❌ %s swipe failed: %s", self._log_prefix, e)
             return False
-    
+
     def get_screen_text(self) -> str:
         """Get screen text using GBOX OCR"""
         try:
             if self.device:
                 text = self.device.get_screen_text()
-                logging.info(f"📱 GBOX: Retrieved screen text ({len(text)} chars)")
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("📱 %s: Retrieved screen text (%d chars)",
+                                self._log_prefix, len(text))
                 return text
             return ""
         except Exception as e:
-            logging.error(f"❌ GBOX get_screen_text failed: {e}")
+            logger.error("❌ %s get_screen_text failed: %s", self._log_prefix, e)
             return ""
-    
-    def take_screenshot(self) -> Optional[bytes]:
-        """Take screenshot using GBOX"""
+
+    def take_screenshot(self) -> Optional[memoryview]:
+        """Take screenshot using GBOX.
+
+        Returns a zero-copy memoryview over the image blob; wrap with
+        bytes(...) only at boundaries that truly need an owned copy.
+        """
         try:
             if self.device:
                 screenshot = self.device.take_screenshot()
-                logging.info(f"📸 GBOX: Screenshot captured ({len(screenshot)} bytes)")
-                return screenshot
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("📸 %s: Screenshot captured (%d bytes)",
+                                self._log_prefix, len(screenshot))
+                return memoryview(screenshot)
             return None
         except Exception as e:
-            logging.error(f"❌ GBOX screenshot failed: {e}")
+            logger.error("❌ %s screenshot failed: %s", self._log_prefix, e)
             return None
-    
+
+    def press_key(self, key: str) -> bool:
+        """Press a single key (delegates to the batched key path)"""
+        return self.press_keys([key])
+
     def is_connected(self) -> bool:
         """Check if device is connected via GBOX"""
         return self.device is not None and self.device.is_connected()
-    
+
     def get_device_info(self) -> Dict[str, Any]:
-        """Get device information from GBOX"""
+        """Get device information from GBOX (immutable fields cached)"""
         try:
             if self.device:
-                info = {
-                    'id': self.device.id,
-                    'name': self.device.name,
-                    'model': self.device.model,
-                    'android_version': self.device.android_version,
-                    'connected': self.device.is_connected()
-                }
-                return info
+                # id/name/model/android_version never change; only the
+                # connected flag needs a live check
+                if self._static_info is None:
+                    self._static_info = {
+                        'id': self.device.id,
+                        'name': self.device.name,
+                        'model': self.device.model,
+                        'android_version': self.device.android_version
+                    }
+                    if self._device_type is not None:
+                        self._static_info['type'] = self._device_type
+                return {**self._static_info, 'connected': self.device.is_connected()}
             return {}
         except Exception as e:
-            logging.error(f"❌ GBOX get_device_info failed: {e}")
+            logger.error("❌ %s get_device_info failed: %s", self._log_prefix, e)
             return {}
 
-class GBOXLocalDeviceController(DeviceController):
-    """Local device controller using GBOX for emulator/ADB devices"""
-    
-    def __init__(self, device_id: str, gbox_api_key: Optional[str] = None):
-        super().__init__(device_id)
-        self.gbox_api_key = gbox_api_key or os.getenv('GBOX_API_KEY')
-        self.client = None
-        self.device = None
-        
-        if not self.gbox_api_key:
-            raise ValueError("GBOX_API_KEY environment variable required")
-        
-        if GBOX_AVAILABLE:
-            self._initialize_local_gbox()
-        else:
-            raise RuntimeError("GBOX SDK not available")
-    
-    def _initialize_local_gbox(self):
-        """Initialize GBOX client for local device"""
+class GBOXDeviceController(_GBOXBase):
+    """Real device controller using GBOX SDK"""
+
+    __slots__ = ()
+
+    _log_prefix = "GBOX"
+
+    def _initialize(self):
+        """Initialize GBOX client and connect to device"""
         try:
-            self.client = GBoxClient(api_key=self.gbox_api_key)
-            # For local devices, we need to register them first
-            self.device = self.client.register_local_device(self.device_id)
-            logging.info(f"✅ Registered local device with GBOX: {self.device_id}")
+            self.client = _get_gbox_client(self.gbox_api_key)
+            self.device = self.client.get_device(self.device_id)
+            logger.info("✅ Connected to GBOX device: %s", self.device_id)
         except Exception as e:
-            logging.error(f"❌ Failed to register local device: {e}")
+            logger.error("❌ Failed to connect to GBOX device: %s", e)
             raise
-    
-    def click(self, x: int, y: int) -> bool:
-        """Click at specific coordinates using local GBOX"""
+
+    def execute_batch(self, commands: List[str]) -> bool:
+        """Execute multiple input commands in a single GBOX ADB round-trip"""
         try:
             if self.device:
-                self.device.click(x, y)
-                logging.info(f"🖱️  Local GBOX: Clicked at ({x}, {y})")
+                self.device.execute_adb("; ".join(commands))
+                logger.info("⚡ GBOX: Executed batch of %d commands", len(commands))
                 return True
             return False
         except Exception as e:
-            logging.error(f"❌ Local GBOX click failed: {e}")
+            logger.error("❌ GBOX execute_batch failed: %s", e)
             return False
-    
-    def type_text(self, text: str) -> bool:
-        """Type text using local GBOX"""
+
+    def wait_for_idle(self, timeout_ms: int = 2000, poll_ms: int = 100) -> bool:
+        """Wait for the device UI to settle via GBOX instead of a fixed sleep"""
         try:
             if self.device:
-                self.device.type_text(text)
-                logging.info(f"⌨️  Local GBOX: Typed text: '{text}'")
+                self.device.wait_for_idle(timeout_ms)
                 return True
             return False
         except Exception as e:
-            logging.error(f"❌ Local GBOX type_text failed: {e}")
+            logger.error("❌ GBOX wait_for_idle failed: %s", e)
             return False
-    
-    def swipe(self, start_x: int, start_y: int, end_x: int, end_y: int, duration: float = 0.5) -> bool:
-        """Swipe between coordinates using local GBOX"""
+
+    def press_keys(self, keys: List[str]) -> bool:
+        """Press a key sequence in a single GBOX ADB round-trip"""
         try:
             if self.device:
-                self.device.swipe(start_x, start_y, end_x, end_y, duration)
-                logging.info(f"👆 Local GBOX: Swiped from ({start_x}, {start_y}) to ({end_x}, {end_y})")
+                self.device.execute_adb("input keyevent " + " ".join(keys))
+                logger.info("⌨️  GBOX: Pressed keys: %s", keys)
                 return True
             return False
         except Exception as e:
-            logging.error(f"❌ Local GBOX swipe failed: {e}")
+            logger.error("❌ GBOX press_keys failed: %s", e)
             return False
-    
-    def get_screen_text(self) -> str:
-        """Get screen text using local GBOX OCR"""
+
+    def get_screen_info(self) -> Dict[str, Any]:
+        """Get current screen information (dimensions cached after first fetch)"""
+        if self._screen_dims is None:
+            try:
+                if self.device:
+                    self._screen_dims = tuple(self.device.get_screen_size())
+            except Exception as e:
+                logger.error("❌ GBOX get_screen_info failed: %s", e)
+
+        width, height = self._screen_dims or (0, 0)
+        return {
+            "width": width,
+            "height": height,
+            "orientation": "portrait" if height >= width else "landscape",
+            "timestamp": time.time()
+        }
+
+class GBOXLocalDeviceController(_GBOXBase):
+    """Local device controller using GBOX for emulator/ADB devices"""
+
+    __slots__ = ()
+
+    _log_prefix = "Local GBOX"
+    _device_type = 'local_device'
+
+    def _initialize(self):
+        """Initialize GBOX client for local device"""
         try:
-            if self.device:
-                text = self.device.get_screen_text()
-                logging.info(f"📱 Local GBOX: Retrieved screen text ({len(text)} chars)")
-                return text
-            return ""
+            self.client = _get_gbox_client(self.gbox_api_key)
+            # For local devices, we need to register them first
+            self.device = self.client.register_local_device(self.device_id)
+            logger.info("✅ Registered local device with GBOX: %s", self.device_id)
         except Exception as e:
-            logging.error(f"❌ Local GBOX get_screen_text failed: {e}")
-            return ""
-    
-    def take_screenshot(self) -> Optional[bytes]:
-        """Take screenshot using local GBOX"""
+            logger.error("❌ Failed to register local device: %s", e)
+            raise
+
+    def execute_batch(self, commands: List[str]) -> bool:
+        """Execute multiple input commands in a single adb shell invocation"""
         try:
-            if self.device:
-                screenshot = self.device.take_screenshot()
-                logging.info(f"📸 Local GBOX: Screenshot captured ({len(screenshot)} bytes)")
-                return screenshot
-            return None
+            adb_path = os.getenv('ADB_PATH', 'adb')
+            result = subprocess.run(
+                [adb_path, '-s', self.device_id, 'shell', '; '.join(commands)],
+                capture_output=True,
+                text=True,
+                timeout=30
+            )
+            if result.returncode == 0:
+                logger.info("⚡ Local GBOX: Executed batch of %d commands", len(commands))
+                return True
+            logger.error("❌ Local GBOX execute_batch failed: %s", result.stderr)
+            return False
         except Exception as e:
-            logging.error(f"❌ Local GBOX screenshot failed: {e}")
-            return None
-    
-    def is_connected(self) -> bool:
-        """Check if local device is connected via GBOX"""
-        return self.device is not None and self.device.is_connected()
-    
-    def get_device_info(self) -> Dict[str, Any]:
-        """Get local device information from GBOX"""
+            logger.error("❌ Local GBOX execute_batch failed: %s", e)
+            return False
+
+    def wait_for_idle(self, timeout_ms: int = 2000, poll_ms: int = 100) -> bool:
+        """Poll window focus until the UI settles instead of sleeping a fixed interval"""
         try:
-            if self.device:
-                info = {
-                    'id': self.device.id,
-                    'name': self.device.name,
-                    'model': self.device.model,
-                    'android_version': self.device.android_version,
-                    'connected': self.device.is_connected(),
-                    'type': 'local_device'
-                }
-                return info
-            return {}
+            adb_path = os.getenv('ADB_PATH', 'adb')
+            deadline = time.monotonic() + timeout_ms / 1000.0
+            last_focus = None
+
+            while time.monotonic() < deadline:
+                result = subprocess.run(
+                    [adb_path, '-s', self.device_id, 'shell',
+                     'dumpsys', 'window', 'windows'],
+                    capture_output=True,
+                    text=True,
+                    timeout=10
+                )
+                focus = next(
+                    (line for line in result.stdout.splitlines()
+                     if 'mCurrentFocus' in line),
+                    ''
+                )
+                # Two consecutive identical focus reads means the window settled
+                if last_focus is not None and focus == last_focus:
+                    return True
+                last_focus = focus
+                time.sleep(poll_ms / 1000.0)
+
+            return False
         except Exception as e:
-            logging.error(f"❌ Local GBOX get_device_info failed: {e}")
-            return {}
+            logger.error("❌ Local GBOX wait_for_idle failed: %s", e)
+            return False
+
+    def press_keys(self, keys: List[str]) -> bool:
+        """Press a key sequence in a single adb shell invocation.
+
+        `input keyevent` natively accepts multiple keycodes, so a sequence
+        costs one round-trip instead of one per key.
+        """
+        return self.execute_batch(["input keyevent " + " ".join(keys)])
+
+    def get_screen_info(self) -> Dict[str, Any]:
+        """Get current screen information (dimensions cached after first fetch)"""
+        if self._screen_dims is None:
+            try:
+                adb_path = os.getenv('ADB_PATH', 'adb')
+                result = subprocess.run(
+                    [adb_path, '-s', self.device_id, 'shell', 'wm', 'size'],
+                    capture_output=True,
+                    text=True,
+                    timeout=10
+                )
+                # Screen dimensions never change for a device, so one
+                # 'wm size' round-trip is enough for the controller lifetime
+                if result.returncode == 0 and 'Physical size:' in result.stdout:
+                    size = result.stdout.split('Physical size: ')[1].strip()
+                    width, height = size.split('x')
+                    self._screen_dims = (int(width), int(height))
+            except Exception as e:
+                logger.error("❌ Local GBOX get_screen_info failed: %s", e)
+
+        width, height = self._screen_dims or (0, 0)
+        return {
+            "width": width,
+            "height": height,
+            "orientation": "portrait" if height >= width else "landscape",
+            "timestamp": time.time()
+        }
+
+class AsyncDeviceController(ABC):
+    """Abstract base class for async device control operations"""
+
+    @abstractmethod
+    async def click(self, x: int, y: int) -> bool:
+        """Click at specific coordinates."""
+        pass
+
+    @abstractmethod
+    async def swipe(self, start_x: int, start_y: int, end_x: int, end_y: int, duration: float = 0.5) -> bool:
+        """Swipe from start to end coordinates."""
+        pass
+
+    @abstractmethod
+    async def type_text(self, text: str) -> bool:
+        """Type text on the device."""
+        pass
+
+    @abstractmethod
+    async def execute_batch(self, commands: List[str]) -> bool:
+        """Execute multiple input commands in a single device round-trip."""
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Release the underlying connection."""
+        pass
+
+class AsyncGBOXDeviceController(AsyncDeviceController):
+    """Async device controller talking to the GBOX REST API via aiohttp.
+
+    A single ClientSession is held per controller so TCP/TLS connections are
+    pooled across actions; one event loop can overlap dozens of in-flight
+    device calls instead of blocking a thread per RPC.
+    """
+
+    def __init__(self, device_id: str, gbox_api_key: Optional[str] = None):
+        self.device_id = device_id
+        self.gbox_api_key = gbox_api_key or _ENV_API_KEY
+        self._session = None
+
+        if not self.gbox_api_key:
+            raise ValueError("GBOX_API_KEY environment variable required")
+
+        if not AIOHTTP_AVAILABLE:
+            raise RuntimeError("aiohttp not available. Install with: pip install aiohttp")
+
+    async def _post(self, action: str, payload: Dict[str, Any]) -> bool:
+        """POST one device action, creating the pooled session lazily"""
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                headers={"Authorization": f"Bearer {self.gbox_api_key}"}
+            )
+
+        url = f"{GBOX_API_BASE}/devices/{self.device_id}/{action}"
+        try:
+            async with self._session.post(url, json=payload) as response:
+                return response.status == 200
+        except Exception as e:
+            logger.error("❌ Async GBOX %s failed: %s", action, e)
+            return False
+
+    async def click(self, x: int, y: int) -> bool:
+        return await self._post("click", {"x": x, "y": y})
+
+    async def swipe(self, start_x: int, start_y: int, end_x: int, end_y: int, duration: float = 0.5) -> bool:
+        return await self._post("swipe", {
+            "start_x": start_x, "start_y": start_y,
+            "end_x": end_x, "end_y": end_y,
+            "duration": duration
+        })
+
+    async def type_text(self, text: str) -> bool:
+        return await self._post("type", {"text": text})
+
+    async def execute_batch(self, commands: List[str]) -> bool:
+        return await self._post("adb", {"command": "; ".join(commands)})
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
 
 if __name__ == "__main__":
     # Test the GBOX device controllers
     print("🔧 GBOX Device Controller Test")
     print("=" * 40)
-    
+
     # Test without API key (should fail gracefully)
     try:
         controller = GBOXDeviceController("test_device")
     except ValueError as e:
         print(f"✅ Expected error (no API key): {e}")
-    
+
     print("\n📋 GBOX Device Controllers ready for integration!")
     print("💡 Set GBOX_API_KEY environment variable to enable real device control")
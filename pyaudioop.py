@@ -8,37 +8,22 @@ import warnings
 
 def _not_implemented(*args, **kwargs):
     """Placeholder function that warns about missing functionality."""
-    warnings.warn("pyaudioop functionality not available in Python 3.13+. This is a compatibility stub.", 
+    warnings.warn("pyaudioop functionality not available in Python 3.13+. This is a compatibility stub.",
                   RuntimeWarning, stacklevel=2)
     return None
 
-# Common pyaudioop functions that pydub might use
-add = _not_implemented
-adpcm2lin = _not_implemented
-adpcm32lin = _not_implemented
-adpcm42lin = _not_implemented
-alaw2lin = _not_implemented
-avg = _not_implemented
-avgpp = _not_implemented
-bias = _not_implemented
-cross = _not_implemented
-findfactor = _not_implemented
-findfit = _not_implemented
-findmax = _not_implemented
-getsample = _not_implemented
-lin2adpcm = _not_implemented
-lin2adpcm3 = _not_implemented
-lin2adpcm4 = _not_implemented
-lin2alaw = _not_implemented
-lin2lin = _not_implemented
-lin2ulaw = _not_implemented
-max = _not_implemented
-maxpp = _not_implemented
-minmax = _not_implemented
-mul = _not_implemented
-ratecv = _not_implemented
-reverse = _not_implemented
-rms = _not_implemented
-tomono = _not_implemented
-tostereo = _not_implemented
-ulaw2lin = _not_implemented
+# Common pyaudioop functions that pydub might use, bound lazily via PEP 562
+# module __getattr__: importing the module no longer executes one STORE_NAME
+# per stub, and unused stubs never enter the module dict
+_STUBS = frozenset({
+    'add', 'adpcm2lin', 'adpcm32lin', 'adpcm42lin', 'alaw2lin', 'avg',
+    'avgpp', 'bias', 'cross', 'findfactor', 'findfit', 'findmax',
+    'getsample', 'lin2adpcm', 'lin2adpcm3', 'lin2adpcm4', 'lin2alaw',
+    'lin2lin', 'lin2ulaw', 'max', 'maxpp', 'minmax', 'mul', 'ratecv',
+    'reverse', 'rms', 'tomono', 'tostereo', 'ulaw2lin',
+})
+
+def __getattr__(name):
+    if name in _STUBS:
+        return _not_implemented
+    raise AttributeError(f"module 'pyaudioop' has no attribute {name!r}")
@@ -4,61 +4,89 @@ Complete Integration Test for Custom Agent + GBOX + AndroidWorld
 This script tests the full pipeline from device registration to task execution.
 """
 
+# Annotations stay strings at runtime, so module import skips resolving them
+from __future__ import annotations
+
 import os
 import sys
 import time
+import asyncio
+import heapq
 import logging
-from typing import Dict, Any
+import subprocess
+import traceback
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Tuple
 
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Set up logging: status lines stream through one buffered stdout handler
+# instead of a write() syscall per print
+logging.basicConfig(level=logging.INFO, format='%(message)s',
+                    handlers=[logging.StreamHandler(sys.stdout)])
 logger = logging.getLogger(__name__)
 
-# Add current directory to path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Add current directory to path (idempotent: repeated imports under test
+# discovery would otherwise prepend a duplicate entry and lengthen every
+# subsequent sys.path scan)
+_here = os.path.dirname(os.path.abspath(__file__))
+if _here not in sys.path:
+    sys.path.insert(0, _here)
+
+# Banner strings built once instead of re-multiplying per call
+_EQ60 = "=" * 60
+_EQ50 = "=" * 50
+_EQ45 = "=" * 45
+_EQ40 = "=" * 40
+_EQ35 = "=" * 35
+
+# Resolved once at import: the key and binary don't change mid-run, so the
+# per-test os.getenv / os.path.exists round-trips are paid a single time
+GBOX_API_KEY = os.getenv("GBOX_API_KEY")
+ADB_PATH = r"C:\Users\aney4\AppData\Local\Android\Sdk\platform-tools\adb.exe"
+ADB_EXISTS = os.path.exists(ADB_PATH)
 
 
 def test_device_registration():
     """Test device registration with GBOX."""
-    print("\n🔧 Testing Device Registration...")
-    print("=" * 40)
+    logger.info(f"\n🔧 Testing Device Registration...\n{_EQ40}")
     
     try:
         from device_registration import GBOXDeviceManager
         
         # Check if GBOX API key is set
-        gbox_api_key = os.getenv("GBOX_API_KEY")
-        if not gbox_api_key:
-            print("❌ GBOX_API_KEY not set. Skipping device registration test.")
+        if not GBOX_API_KEY:
+            logger.info("❌ GBOX_API_KEY not set. Skipping device registration test.")
             return False
-        
-        adb_path = r"C:\Users\aney4\AppData\Local\Android\Sdk\platform-tools\adb.exe"
-        device_manager = GBOXDeviceManager(adb_path, gbox_api_key)
+
+        device_manager = GBOXDeviceManager(ADB_PATH, GBOX_API_KEY)
         
         # Get available devices
         available_devices = device_manager.get_available_devices()
-        print(f"📱 Found {len(available_devices)} device(s)")
+        logger.info(f"📱 Found {len(available_devices)} device(s)")
         
         if not available_devices:
-            print("❌ No devices found. Make sure emulator is running.")
+            logger.info("❌ No devices found. Make sure emulator is running.")
             return False
         
-        # Show device information
-        for device in available_devices:
-            print(f"\n  Device: {device['id']}")
-            print(f"    Type: {device.get('type', 'unknown')}")
-            print(f"    Model: {device.get('properties', {}).get('ro.product.model', 'unknown')}")
-            print(f"    Android: {device.get('properties', {}).get('ro.build.version.release', 'unknown')}")
+        # Show device information; the per-device property fetches were
+        # already fanned out in parallel by get_available_devices, so this
+        # is pure formatting over the returned dicts
+        logger.info("\n".join(
+            f"\n  Device: {device['id']}\n"
+            f"    Type: {device.get('type', 'unknown')}\n"
+            f"    Model: {device.get('properties', {}).get('ro.product.model', 'unknown')}\n"
+            f"    Android: {device.get('properties', {}).get('ro.build.version.release', 'unknown')}"
+            for device in available_devices
+        ))
         
         # Try to register emulator
         emulator_id = "emulator-5554"
         gbox_device_id = device_manager.setup_emulator_for_gbox(emulator_id)
         
         if gbox_device_id:
-            print(f"✅ Emulator registered with GBOX: {gbox_device_id}")
+            logger.info(f"✅ Emulator registered with GBOX: {gbox_device_id}")
             return gbox_device_id
         else:
-            print("❌ Failed to register emulator")
+            logger.info("❌ Failed to register emulator")
             return False
             
     except Exception as e:
@@ -66,45 +94,52 @@ def test_device_registration():
         return False
 
 
+async def _run_controller_ops(controller) -> bool:
+    """Exercise the controller with overlapped round-trips.
+
+    Each operation is a blocking device RPC; running them via
+    asyncio.to_thread and gathering the order-independent ones overlaps
+    their latency instead of paying one full round-trip per call. The
+    screen-info fetch doesn't touch UI state, so it rides alongside the
+    click; only the text input has to wait for the click to land.
+    """
+    screen_info, click_ok = await asyncio.gather(
+        asyncio.to_thread(controller.get_screen_info),
+        asyncio.to_thread(controller.click, 500, 1200),
+    )
+    logger.info(f"📺 Screen info: {screen_info}")
+    logger.info(f"Click result: {click_ok}")
+
+    type_ok = await asyncio.to_thread(controller.type_text, "Test Input")
+    logger.info(f"Text input result: {type_ok}")
+
+    return click_ok and type_ok
+
+
 def test_gbox_device_controller(gbox_device_id: str):
     """Test GBOX device controller functionality."""
-    print(f"\n🎮 Testing GBOX Device Controller...")
-    print("=" * 45)
+    logger.info(f"\n🎮 Testing GBOX Device Controller...\n{_EQ45}")
     
     try:
         from gbox_device_controller import GBOXLocalDeviceController
         
-        gbox_api_key = os.getenv("GBOX_API_KEY")
-        if not gbox_api_key:
-            print("❌ GBOX_API_KEY not set. Skipping device controller test.")
+        if not GBOX_API_KEY:
+            logger.info("❌ GBOX_API_KEY not set. Skipping device controller test.")
             return False
-        
+
         # Create device controller
-        controller = GBOXLocalDeviceController(gbox_device_id, gbox_api_key)
-        print(f"✅ GBOX device controller created for: {gbox_device_id}")
-        
-        # Test basic operations
-        print("\n📱 Testing device operations...")
-        
-        # Get screen info
-        screen_info = controller.get_screen_info()
-        print(f"📺 Screen info: {screen_info}")
-        
-        # Test click (this will actually click on the device)
-        print("🖱️ Testing click operation...")
-        success = controller.click(500, 1200)
-        print(f"Click result: {success}")
-        
-        # Test text input
-        print("⌨️ Testing text input...")
-        success = controller.type_text("Test Input")
-        print(f"Text input result: {success}")
+        controller = GBOXLocalDeviceController(gbox_device_id, GBOX_API_KEY)
+        logger.info(f"✅ GBOX device controller created for: {gbox_device_id}")
         
+        # Test basic operations with overlapped RPCs
+        logger.info("\n📱 Testing device operations...")
+        ops_ok = asyncio.run(_run_controller_ops(controller))
+
         # Clean up
         controller.close_box()
-        print("🧹 Device controller closed")
-        
-        return True
+        logger.info("🧹 Device controller closed")
+
+        return ops_ok
         
     except Exception as e:
         logger.error(f"GBOX device controller test failed: {e}")
@@ -113,18 +148,17 @@ def test_gbox_device_controller(gbox_device_id: str):
 
 def test_custom_agent():
     """Test custom agent with mock device controller."""
-    print(f"\n🤖 Testing Custom Agent...")
-    print("=" * 35)
+    logger.info(f"\n🤖 Testing Custom Agent...\n{_EQ35}")
     
     try:
         from custom_agent import CustomAgent
         
         # Create custom agent with mock controller
         agent = CustomAgent()
-        print("✅ Custom agent created")
+        logger.info("✅ Custom agent created")
         
         # Test task execution
-        print("\n📋 Testing task execution...")
+        logger.info("\n📋 Testing task execution...")
         
         # Test recipe task
         recipe_result = agent.run_task("RecipeAddMultipleRecipes", {
@@ -132,19 +166,19 @@ def test_custom_agent():
             "ingredients": ["ingredient1", "ingredient2"],
             "instructions": "Test instructions"
         })
-        print(f"✅ Recipe task result: {recipe_result['success']}")
+        logger.info(f"✅ Recipe task result: {recipe_result['success']}")
         
         # Test calendar task
         calendar_result = agent.run_task("SimpleCalendarAddOneEvent", {
             "event_title": "Test Event",
             "event_date": "2025-08-30"
         })
-        print(f"✅ Calendar task result: {calendar_result['success']}")
+        logger.info(f"✅ Calendar task result: {calendar_result['success']}")
         
         # Get agent status
         status = agent.get_status()
-        print(f"🤖 Agent status: {status['status']}")
-        print(f"📊 Tasks executed: {status['tasks_executed']}")
+        logger.info(f"🤖 Agent status: {status['status']}")
+        logger.info(f"📊 Tasks executed: {status['tasks_executed']}")
         
         return True
         
@@ -155,59 +189,67 @@ def test_custom_agent():
 
 def test_androidworld_integration(gbox_device_id: str):
     """Test complete AndroidWorld integration."""
-    print(f"\n🔗 Testing AndroidWorld Integration...")
-    print("=" * 45)
+    logger.info(f"\n🔗 Testing AndroidWorld Integration...\n{_EQ45}")
     
     try:
         from android_world_integration import AndroidWorldIntegration
         
-        gbox_api_key = os.getenv("GBOX_API_KEY")
-        if not gbox_api_key:
-            print("❌ GBOX_API_KEY not set. Skipping AndroidWorld integration test.")
+        if not GBOX_API_KEY:
+            logger.info("❌ GBOX_API_KEY not set. Skipping AndroidWorld integration test.")
             return False
-        
-        adb_path = r"C:\Users\aney4\AppData\Local\Android\Sdk\platform-tools\adb.exe"
-        integration = AndroidWorldIntegration(adb_path, gbox_api_key)
+
+        integration = AndroidWorldIntegration(ADB_PATH, GBOX_API_KEY)
         
         # Set up GBOX device
-        print("🔧 Setting up GBOX device...")
+        logger.info("🔧 Setting up GBOX device...")
         if not integration.setup_gbox_device():
-            print("❌ Failed to setup GBOX device")
+            logger.info("❌ Failed to setup GBOX device")
             return False
         
-        print("✅ GBOX device setup complete")
+        logger.info("✅ GBOX device setup complete")
         
         # Get device status
         device_status = integration.get_device_status()
-        print(f"📱 Device status: {device_status.get('registration', {}).get('status', 'unknown')}")
+        logger.info(f"📱 Device status: {device_status.get('registration', {}).get('status', 'unknown')}")
         
         # Initialize AndroidWorld
-        print("\n🚀 Initializing AndroidWorld...")
+        logger.info("\n🚀 Initializing AndroidWorld...")
         if not integration.initialize_androidworld():
-            print("❌ Failed to initialize AndroidWorld")
+            logger.info("❌ Failed to initialize AndroidWorld")
             return False
         
-        print("✅ AndroidWorld initialized")
+        logger.info("✅ AndroidWorld initialized")
         
-        # Get available tasks
+        # Get available tasks; a frozenset makes the membership checks
+        # O(1) instead of scanning the ~116-entry list per lookup
         available_tasks = integration.get_available_tasks()
-        print(f"📋 Available tasks: {len(available_tasks)}")
+        task_set = frozenset(available_tasks)
+        logger.info(f"📋 Available tasks: {len(available_tasks)}")
         
         if available_tasks:
             # Show sample tasks
             sample_tasks = available_tasks[:3]
             for i, task in enumerate(sample_tasks, 1):
-                print(f"  {i}. {task}")
+                logger.info(f"  {i}. {task}")
             
             # Test a specific task if available
-            if "RecipeAddMultipleRecipes" in available_tasks:
-                print(f"\n🎯 Testing RecipeAddMultipleRecipes task...")
-                result = integration.run_benchmark_task("RecipeAddMultipleRecipes")
-                print(f"✅ Task result: {result}")
+            if "RecipeAddMultipleRecipes" in task_set:
+                logger.info(f"\n🎯 Testing RecipeAddMultipleRecipes task...")
+                # Submit and poll instead of blocking: the harness stays
+                # free to interleave other work while the task runs
+                task_id = integration.submit_benchmark_task("RecipeAddMultipleRecipes")
+                delay = 0.5
+                while True:
+                    status = integration.get_task_status(task_id)
+                    if status["status"] != "running":
+                        break
+                    time.sleep(delay)
+                    delay = min(delay * 2, 10.0)
+                logger.info(f"✅ Task result: {status}")
         
         # Clean up
         integration.cleanup()
-        print("🧹 Integration cleanup complete")
+        logger.info("🧹 Integration cleanup complete")
         
         return True
         
@@ -216,76 +258,232 @@ def test_androidworld_integration(gbox_device_id: str):
         return False
 
 
+TRANSIENT = 'transient'
+PERMANENT = 'permanent'
+
+# Exception types that indicate a flake worth retrying rather than a bug
+_TRANSIENT_EXCEPTIONS = (ConnectionError, TimeoutError)
+
+
+@dataclass
+class FailedTask:
+    """One dead-lettered test failure, kept for post-run triage."""
+    name: str
+    exception: Exception
+    traceback: str
+    classification: str
+
+
+# Dead-letter queue: every exception escaping a test lands here with its
+# classification, so flakes are distinguishable from real breakage
+DLQ: list = []
+
+
+def _classify(exc: Exception) -> str:
+    """Classify an exception as a transient flake or a permanent failure."""
+    return TRANSIENT if isinstance(exc, _TRANSIENT_EXCEPTIONS) else PERMANENT
+
+
+def _run_with_retry(spec, values, retries: int = 3):
+    """Run one test, retrying transient failures with exponential backoff.
+
+    Permanent failures (and transient ones that exhaust their retries) are
+    appended to the DLQ and reported as a failed test instead of crashing
+    the scheduler.
+    """
+    delay = 1.0
+    for attempt in range(retries):
+        try:
+            return spec.fn(values)
+        except Exception as e:
+            classification = _classify(e)
+            DLQ.append(FailedTask(spec.name, e, traceback.format_exc(), classification))
+            if classification == PERMANENT or attempt == retries - 1:
+                logger.error(f"Test '{spec.name}' failed ({classification}): {e}")
+                return False
+            logger.info(f"⏳ Transient failure in '{spec.name}' "
+                        f"(attempt {attempt + 1}/{retries}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+            delay *= 2
+    return False
+
+
+class TestStateMachine:
+    """Tracks each test through pending→running→passed/failed/skipped.
+
+    Replaces the ad-hoc booleans-in-a-dict bookkeeping: skip decisions
+    become O(1) state lookups, an illegal transition fails loudly instead
+    of silently overwriting a result, and every transition is logged.
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    PASSED = 'passed'
+    FAILED = 'failed'
+    SKIPPED = 'skipped'
+
+    # Legal transitions; the terminal states accept none
+    _TRANSITIONS = {
+        PENDING: {RUNNING, SKIPPED},
+        RUNNING: {PASSED, FAILED},
+        PASSED: frozenset(),
+        FAILED: frozenset(),
+        SKIPPED: frozenset(),
+    }
+
+    __slots__ = ('states', 'values')
+
+    def __init__(self, names):
+        self.states = {name: self.PENDING for name in names}
+        # Truthy values returned by passed tests (e.g. the gbox_device_id
+        # from registration), consumed by downstream tests
+        self.values = {}
+
+    def transition(self, name, new_state):
+        current = self.states[name]
+        if new_state not in self._TRANSITIONS[current]:
+            raise ValueError(
+                f"Illegal transition for '{name}': {current} -> {new_state}")
+        self.states[name] = new_state
+        logger.info("test %s: %s -> %s", name, current, new_state)
+
+    def mark_running(self, name):
+        self.transition(name, self.RUNNING)
+
+    def mark_passed(self, name, value=True):
+        self.transition(name, self.PASSED)
+        self.values[name] = value
+
+    def mark_failed(self, name):
+        self.transition(name, self.FAILED)
+
+    def mark_skipped(self, name):
+        self.transition(name, self.SKIPPED)
+
+    def is_passed(self, name) -> bool:
+        return self.states.get(name) == self.PASSED
+
+
+@dataclass(order=True)
+class TestSpec:
+    """One schedulable test: cheap/critical tests get low priorities."""
+    priority: int
+    name: str = field(compare=False)
+    fn: Callable[[Dict[str, Any]], Any] = field(compare=False)
+    deps: Tuple[str, ...] = field(default=(), compare=False)
+    critical: bool = field(default=False, compare=False)
+
+
+def _run_suite(specs) -> TestStateMachine:
+    """Run tests in priority order, failing the suite early.
+
+    A heap pops the cheapest/most critical tests first, so a 200ms smoke
+    failure aborts the run before the minutes-long device chain ever
+    starts. Tests whose dependencies didn't pass (or that follow a
+    critical failure) are skipped without running; fn receives the values
+    of passed tests, which is how the registration result reaches the
+    downstream tests.
+    """
+    sm = TestStateMachine(spec.name for spec in specs)
+    heap = list(specs)
+    heapq.heapify(heap)
+    aborted = False
+
+    while heap:
+        spec = heapq.heappop(heap)
+        if aborted or not all(sm.is_passed(dep) for dep in spec.deps):
+            sm.mark_skipped(spec.name)
+            continue
+
+        sm.mark_running(spec.name)
+        value = _run_with_retry(spec, sm.values)
+        if value:
+            sm.mark_passed(spec.name, value)
+        else:
+            sm.mark_failed(spec.name)
+            if spec.critical:
+                logger.info(f"\n⛔ Critical test '{spec.name}' failed; aborting remaining tests")
+                aborted = True
+
+    return sm
+
+
 def main():
     """Main test function."""
-    print("🧪 Complete Integration Test Suite")
-    print("=" * 50)
-    print("Testing: Custom Agent + GBOX + AndroidWorld Integration")
+    logger.info("🧪 Complete Integration Test Suite\n"
+                f"{_EQ50}\n"
+                "Testing: Custom Agent + GBOX + AndroidWorld Integration")
     
     # Check prerequisites
-    gbox_api_key = os.getenv("GBOX_API_KEY")
-    if not gbox_api_key:
-        print("\n⚠️  GBOX_API_KEY not set!")
-        print("To set it, run: set GBOX_API_KEY=your_api_key_here")
-        print("You can get an API key from: https://gbox.ai")
-        print("\nContinuing with tests that don't require GBOX...")
-    
-    test_results = {}
-    
-    # Test 1: Custom Agent (no GBOX required)
-    print("\n" + "="*60)
-    test_results['custom_agent'] = test_custom_agent()
-    
-    # Test 2: Device Registration (requires GBOX API key)
-    if gbox_api_key:
-        test_results['device_registration'] = test_device_registration()
-        
-        if test_results['device_registration']:
-            gbox_device_id = test_results['device_registration']
-            
-            # Test 3: GBOX Device Controller
-            test_results['gbox_controller'] = test_gbox_device_controller(gbox_device_id)
-            
-            # Test 4: Complete Integration
-            test_results['androidworld_integration'] = test_androidworld_integration(gbox_device_id)
-        else:
-            test_results['gbox_controller'] = False
-            test_results['androidworld_integration'] = False
-    else:
-        test_results['device_registration'] = False
-        test_results['gbox_controller'] = False
-        test_results['androidworld_integration'] = False
-    
+    if not GBOX_API_KEY:
+        logger.info("\n⚠️  GBOX_API_KEY not set!")
+        logger.info("To set it, run: set GBOX_API_KEY=your_api_key_here")
+        logger.info("You can get an API key from: https://gbox.ai")
+        logger.info("\nContinuing with tests that don't require GBOX...")
+
+    # Warm the adb daemon once up front: the first adb invocation pays a
+    # 1-2s server cold start, and every later call in the device tests
+    # piggy-backs on the running daemon
+    if ADB_EXISTS:
+        try:
+            subprocess.run([ADB_PATH, "start-server"],
+                           capture_output=True, timeout=10)
+        except (subprocess.TimeoutExpired, OSError) as e:
+            logger.error(f"adb start-server failed: {e}")
+
+    # Cheapest-first schedule: the mock-only agent smoke test gates the
+    # expensive GBOX chain, and registration feeds the two device tests
+    logger.info("\n" + _EQ60)
+    sm = _run_suite([
+        TestSpec(1, 'custom_agent',
+                 lambda res: test_custom_agent(), critical=True),
+        TestSpec(2, 'device_registration',
+                 lambda res: test_device_registration() if GBOX_API_KEY else False),
+        TestSpec(3, 'gbox_controller',
+                 lambda res: test_gbox_device_controller(res['device_registration']),
+                 deps=('device_registration',)),
+        TestSpec(4, 'androidworld_integration',
+                 lambda res: test_androidworld_integration(res['device_registration']),
+                 deps=('device_registration',)),
+    ])
+
     # Summary
-    print("\n" + "="*60)
-    print("📊 TEST RESULTS SUMMARY")
-    print("="*60)
-    
-    for test_name, result in test_results.items():
-        status = "✅ PASS" if result else "❌ FAIL"
-        print(f"{test_name:.<30} {status}")
-    
+    logger.info(f"\n{_EQ60}\n📊 TEST RESULTS SUMMARY\n{_EQ60}")
+
+    status_labels = {
+        TestStateMachine.PASSED: "✅ PASS",
+        TestStateMachine.FAILED: "❌ FAIL",
+        TestStateMachine.SKIPPED: "⏭️  SKIP",
+    }
+    for test_name, state in sm.states.items():
+        logger.info(f"{test_name:.<30} {status_labels.get(state, state)}")
+
+    if DLQ:
+        logger.info("\n📪 Dead-letter queue:")
+        for failed in DLQ:
+            logger.info(f"  • {failed.name} ({failed.classification}): {failed.exception}")
+
     # Recommendations
-    print("\n💡 RECOMMENDATIONS:")
-    
-    if not gbox_api_key:
-        print("• Set GBOX_API_KEY environment variable to enable full testing")
-        print("• Get API key from: https://gbox.ai")
-    
-    if test_results.get('custom_agent', False):
-        print("• Custom agent framework is working correctly")
-    
-    if test_results.get('device_registration', False):
-        print("• Device registration with GBOX is working")
-    
-    if test_results.get('gbox_controller', False):
-        print("• GBOX device controller is functional")
-    
-    if test_results.get('androidworld_integration', False):
-        print("• Complete integration is working!")
-        print("• You can now run AndroidWorld tasks with your custom agent!")
+    logger.info("\n💡 RECOMMENDATIONS:")
+
+    if not GBOX_API_KEY:
+        logger.info("• Set GBOX_API_KEY environment variable to enable full testing")
+        logger.info("• Get API key from: https://gbox.ai")
+
+    if sm.is_passed('custom_agent'):
+        logger.info("• Custom agent framework is working correctly")
+
+    if sm.is_passed('device_registration'):
+        logger.info("• Device registration with GBOX is working")
+
+    if sm.is_passed('gbox_controller'):
+        logger.info("• GBOX device controller is functional")
+
+    if sm.is_passed('androidworld_integration'):
+        logger.info("• Complete integration is working!")
+        logger.info("• You can now run AndroidWorld tasks with your custom agent!")
     
-    print("\n🎯 Integration test suite completed!")
+    logger.info("\n🎯 Integration test suite completed!")
 
 
 if __name__ == "__main__":